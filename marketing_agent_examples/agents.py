@@ -22,6 +22,47 @@ from marketing_agent_examples.models import (
     SocialMediaPostWithEvaluation,
     SocialMediaPostsWrapper,
 )
+from marketing_agent_examples.utils import ModelT, parse_model_json
+
+def format_feedback(feedback: Optional[str]) -> str:
+    """Formats reviewer feedback on a previous draft so it can be appended to a generation prompt."""
+    if not feedback:
+        return ""
+    return f"""
+
+                A reviewer rejected a previous draft with the following feedback. Address it in this version:
+                <feedback>
+                {feedback}
+                </feedback>
+            """
+
+def generate_validated_variants(
+    llm: ChatOpenAI,
+    messages: list,
+    output_model: type[ModelT],
+    n: int,
+    temperature: float,
+    max_retries: int = 1,
+) -> list[ModelT]:
+    """Requests `n` completions in one call (via the provider's `n` parameter) and validates each one locally.
+
+    Malformed completions go through `parse_model_json`'s local JSON repair
+    first; only the choices that still fail are re-requested, up to
+    `max_retries` times. May return fewer than `n` variants if every retry fails.
+    """
+    if n < 1:
+        raise ValueError(f"n must be at least 1, got {n}")
+
+    variants: list[ModelT] = []
+    for _ in range(max_retries + 1):
+        result = llm.generate([messages], n=n - len(variants), temperature=temperature)
+        for generation in result.generations[0]:
+            variant = parse_model_json(generation.text, output_model)
+            if variant is not None:
+                variants.append(variant)
+        if len(variants) >= n:
+            break
+    return variants
 
 class SocialMediaCampaignIdeaGenerationAgent:
     """AI agent that creates ideas for a social media campaign.
@@ -168,7 +209,7 @@ class BlogPostAgent:
         self.blog_post = None
         self.blog_post_evaluation = None
 
-    def create_blog_post(self, idea: ProposedIdea) -> BlogPost:
+    def build_blog_post_messages(self, idea: ProposedIdea, feedback: Optional[str] = None) -> list:
         blog_prompt = PromptTemplate(
             template="""
                 You are a content marketer creating a blog post for an American-style brunch restaurant.
@@ -205,14 +246,23 @@ class BlogPostAgent:
             audience=idea.audience,
             message=idea.campaign_message,
             concept=idea.concept
-        )
+        ) + format_feedback(feedback)
         messages = [
             SystemMessage(content="You are a helpful assistant."),
             HumanMessage(content=blog_post_full_prompt)
         ]
+        return messages
+
+    def create_blog_post(self, idea: ProposedIdea, feedback: Optional[str] = None) -> BlogPost:
+        messages = self.build_blog_post_messages(idea, feedback=feedback)
         response = self.llm.invoke(messages)
         return self.blog_post_parser.parse(response.content)
 
+    def generate_blog_post_variants(self, idea: ProposedIdea, n: int = 3, temperature: float = 0.8, feedback: Optional[str] = None) -> list[BlogPost]:
+        """Generates up to `n` alternative blog posts (e.g., for A/B testing) in a single request."""
+        messages = self.build_blog_post_messages(idea, feedback=feedback)
+        return generate_validated_variants(self.llm, messages, BlogPost, n=n, temperature=temperature)
+
     def evaluate_blog_post(self, blog_post: BlogPost) -> BlogPostEvaluation:
         blog_post_evaluation_prompt = PromptTemplate(
             template="""
@@ -279,7 +329,7 @@ class EmailBlastDraftAgent:
         self.email_blast_draft = None
         self.email_blast_draft_evaluation = None
 
-    def create_email_blast_draft(self, idea: ProposedIdea, blog_post: BlogPost) -> EmailBlastDraft:
+    def build_email_blast_draft_messages(self, idea: ProposedIdea, blog_post: BlogPost, feedback: Optional[str] = None) -> list:
         email_blast_draft_prompt = PromptTemplate(
             template="""
                 You are an email marketing expert creating a launch email for a brunch restaurant's new campaign.
@@ -322,16 +372,24 @@ class EmailBlastDraftAgent:
             excerpt=blog_post.excerpt,
             content=blog_post.content,
             keywords=", ".join(blog_post.keywords)
-        )
+        ) + format_feedback(feedback)
 
         messages = [
             SystemMessage(content="You are a skilled marketing copywriter and strategist."),
             HumanMessage(content=prompt_text)
         ]
+        return messages
 
+    def create_email_blast_draft(self, idea: ProposedIdea, blog_post: BlogPost, feedback: Optional[str] = None) -> EmailBlastDraft:
+        messages = self.build_email_blast_draft_messages(idea, blog_post, feedback=feedback)
         response = self.llm.invoke(messages)
         return self.email_blast_draft_parser.parse(response.content)
 
+    def generate_email_blast_draft_variants(self, idea: ProposedIdea, blog_post: BlogPost, n: int = 3, temperature: float = 0.8, feedback: Optional[str] = None) -> list[EmailBlastDraft]:
+        """Generates up to `n` alternative email blast drafts (e.g., for A/B testing) in a single request."""
+        messages = self.build_email_blast_draft_messages(idea, blog_post, feedback=feedback)
+        return generate_validated_variants(self.llm, messages, EmailBlastDraft, n=n, temperature=temperature)
+
     def evaluate_email_blast_draft(self, email_blast_draft: EmailBlastDraft) -> EmailBlastDraftEvaluation:
         email_blast_draft_evaluation_prompt = PromptTemplate(
             template="""
@@ -376,8 +434,8 @@ class EmailBlastDraftAgent:
         response = self.llm.invoke(messages)
         return self.email_blast_draft_evaluation_parser.parse(response.content)
     
-    def create_and_evaluate_email_blast_draft(self, idea: ProposedIdea) -> EmailBlastDraftWithEvaluation:
-        self.email_blast_draft: EmailBlastDraft = self.create_email_blast_draft(idea)
+    def create_and_evaluate_email_blast_draft(self, idea: ProposedIdea, blog_post: BlogPost) -> EmailBlastDraftWithEvaluation:
+        self.email_blast_draft: EmailBlastDraft = self.create_email_blast_draft(idea, blog_post)
         self.email_blast_draft_evaluation: EmailBlastDraftEvaluation = self.evaluate_email_blast_draft(self.email_blast_draft)
         self.email_blast_draft_with_evaluation = EmailBlastDraftWithEvaluation(
             email_blast_draft=self.email_blast_draft,
@@ -398,7 +456,7 @@ class SocialMediaPostAgent:
         self.num_posts = num_posts
 
 
-    def create_social_media_posts(self, idea: ProposedIdea, blog_post: BlogPost, email_blast_draft: EmailBlastDraft, num_posts: Optional[int] = None) -> SocialMediaPostsWrapper:
+    def build_social_media_posts_messages(self, idea: ProposedIdea, blog_post: BlogPost, email_blast_draft: EmailBlastDraft, num_posts: Optional[int] = None, feedback: Optional[str] = None) -> list:
         if num_posts is None:
             num_posts = self.num_posts
 
@@ -461,14 +519,23 @@ class SocialMediaPostAgent:
             body=email_blast_draft.body,
             call_to_action=email_blast_draft.call_to_action,
             num_posts=num_posts
-        )
+        ) + format_feedback(feedback)
         messages = [
             SystemMessage(content="You are a creative social media strategist."),
             HumanMessage(content=prompt_text)
         ]
+        return messages
+
+    def create_social_media_posts(self, idea: ProposedIdea, blog_post: BlogPost, email_blast_draft: EmailBlastDraft, num_posts: Optional[int] = None, feedback: Optional[str] = None) -> SocialMediaPostsWrapper:
+        messages = self.build_social_media_posts_messages(idea, blog_post, email_blast_draft, num_posts=num_posts, feedback=feedback)
         response = self.llm.invoke(messages)
         return self.social_media_posts_parser.parse(response.content)
 
+    def generate_social_media_post_variants(self, idea: ProposedIdea, blog_post: BlogPost, email_blast_draft: EmailBlastDraft, n: int = 3, num_posts: Optional[int] = None, temperature: float = 0.8, feedback: Optional[str] = None) -> list[SocialMediaPostsWrapper]:
+        """Generates up to `n` alternative sets of social media posts (e.g., for A/B testing) in a single request."""
+        messages = self.build_social_media_posts_messages(idea, blog_post, email_blast_draft, num_posts=num_posts, feedback=feedback)
+        return generate_validated_variants(self.llm, messages, SocialMediaPostsWrapper, n=n, temperature=temperature)
+
     def evaluate_social_media_post(self, post: SocialMediaPost) -> SocialMediaPostEvaluation:
         social_media_post_evaluation_prompt = PromptTemplate(
             template="""
@@ -544,7 +611,7 @@ class SocialMediaCampaignAgent:
     def __init__(self):
         self.blog_post_agent = BlogPostAgent()
         self.email_blast_draft_agent = EmailBlastDraftAgent()
-        self.social_media_campaign_agent = SocialMediaCampaignAgent()
+        self.social_media_post_agent = SocialMediaPostAgent()
 
     def run(self, idea: ProposedIdea):
         # 1. Create and evaluate blog post
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel, Field
 
 class ProposedIdea(BaseModel):
@@ -83,3 +85,8 @@ class SocialMediaPostEvaluation(BaseModel):
 class SocialMediaPostWithEvaluation(BaseModel):
     social_media_post: SocialMediaPost
     evaluation: SocialMediaPostEvaluation
+
+class ConsistencyReview(BaseModel):
+    is_consistent: bool = Field(..., description="Whether the two pieces of content are consistent with each other and with the campaign idea")
+    artifact_to_revise: Optional[Literal["blog_post", "email_blast", "social_posts"]] = Field(None, description="If inconsistent, the name of the single piece of content that should be rewritten")
+    feedback: str = Field(..., description="Specific, actionable feedback for the piece of content to revise, or a short confirmation if consistent")
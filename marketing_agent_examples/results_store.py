@@ -0,0 +1,240 @@
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+from pydantic import BaseModel
+
+from marketing_agent_examples.models import (
+    BlogPostEvaluation,
+    BlogPostWithEvaluation,
+    EmailBlastDraftEvaluation,
+    EmailBlastDraftWithEvaluation,
+    IdeaEvaluation,
+    IdeaWithEvaluation,
+    ProposedIdea,
+    SocialMediaPostEvaluation,
+    SocialMediaPostWithEvaluation,
+)
+
+
+def score_columns(evaluation_model: type[BaseModel]) -> list[str]:
+    """Returns the integer score fields of an evaluation model, in declaration order."""
+    return [
+        name for name, field in evaluation_model.model_fields.items()
+        if field.annotation is int
+    ]
+
+
+IDEA_SCORE_COLUMNS = score_columns(IdeaEvaluation)
+BLOG_POST_SCORE_COLUMNS = score_columns(BlogPostEvaluation)
+EMAIL_BLAST_SCORE_COLUMNS = score_columns(EmailBlastDraftEvaluation)
+SOCIAL_MEDIA_POST_SCORE_COLUMNS = score_columns(SocialMediaPostEvaluation)
+
+# Metadata columns stored alongside the scores of each artifact type.
+TABLE_METADATA_COLUMNS = {
+    "campaigns": ["campaign_id", "idea", "audience", "campaign_message", "created_at"],
+    "idea_evaluations": ["campaign_id"],
+    "blog_post_evaluations": ["campaign_id", "title", "slug"],
+    "email_blast_evaluations": ["campaign_id", "subject_line", "call_to_action"],
+    "social_media_post_evaluations": ["campaign_id", "post_index", "platform", "intended_audience"],
+}
+
+TABLE_SCORE_COLUMNS = {
+    "campaigns": [],
+    "idea_evaluations": IDEA_SCORE_COLUMNS,
+    "blog_post_evaluations": BLOG_POST_SCORE_COLUMNS,
+    "email_blast_evaluations": EMAIL_BLAST_SCORE_COLUMNS,
+    "social_media_post_evaluations": SOCIAL_MEDIA_POST_SCORE_COLUMNS,
+}
+
+
+class CampaignResultsStore:
+    """Columnar sink for campaign evaluation scores, backed by a local SQLite database.
+
+    Each evaluation model is flattened into one row per artifact, with one
+    column per score, so that analysis can aggregate over columns in SQL
+    instead of loading lists of pydantic objects into memory. Rows are buffered
+    and written in batches of `batch_size`.
+
+    Usage:
+        with CampaignResultsStore("campaign_results.db") as store:
+            store.add_campaign(manager.run_full_campaign())
+            store.mean_score_by_platform()
+    """
+
+    def __init__(self, db_path: str = ":memory:", batch_size: int = 500):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(db_path)
+        self.pending_rows: dict[str, list[tuple]] = {table: [] for table in TABLE_METADATA_COLUMNS}
+        self.create_tables()
+
+    def create_tables(self):
+        for table, metadata_columns in TABLE_METADATA_COLUMNS.items():
+            score_cols = TABLE_SCORE_COLUMNS[table]
+            column_defs = [
+                f"{column} TEXT" if column != "post_index" else f"{column} INTEGER"
+                for column in metadata_columns
+            ]
+            column_defs += [f"{column} INTEGER" for column in score_cols]
+            if score_cols:
+                # Summed inside SQLite so the aggregate is never computed row-by-row in Python.
+                column_defs.append(
+                    f"total_score INTEGER GENERATED ALWAYS AS ({' + '.join(score_cols)}) STORED"
+                )
+            if table == "campaigns":
+                column_defs[0] = "campaign_id TEXT PRIMARY KEY"
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(column_defs)})")
+            if table != "campaigns":
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_campaign_id ON {table} (campaign_id)"
+                )
+        self.connection.commit()
+
+    def add_campaign(self, campaign_outputs: dict, campaign_id: Optional[str] = None) -> str:
+        """Buffers the scores of one campaign, as returned by `SocialMediaManager.run_full_campaign`.
+
+        `campaign_outputs["idea"]` may be either a `ProposedIdea` or an
+        `IdeaWithEvaluation`; idea scores are only stored for the latter.
+        """
+        if campaign_id is None:
+            campaign_id = uuid.uuid4().hex
+        elif self.has_campaign(campaign_id):
+            raise ValueError(f"Campaign {campaign_id!r} is already in the store")
+
+        idea: Union[ProposedIdea, IdeaWithEvaluation] = campaign_outputs["idea"]
+        if isinstance(idea, IdeaWithEvaluation):
+            self.add_row(
+                "idea_evaluations",
+                [campaign_id],
+                self.scores(idea.evaluation, IDEA_SCORE_COLUMNS),
+            )
+            idea = idea.idea
+        self.add_row(
+            "campaigns",
+            [campaign_id, idea.idea, idea.audience, idea.campaign_message, datetime.now(timezone.utc).isoformat()],
+            [],
+        )
+
+        blog_post: Optional[BlogPostWithEvaluation] = campaign_outputs.get("blog_post")
+        if blog_post is not None:
+            self.add_row(
+                "blog_post_evaluations",
+                [campaign_id, blog_post.blog_post.title, blog_post.blog_post.slug],
+                self.scores(blog_post.evaluation, BLOG_POST_SCORE_COLUMNS),
+            )
+
+        email_blast: Optional[EmailBlastDraftWithEvaluation] = campaign_outputs.get("email_blast")
+        if email_blast is not None:
+            self.add_row(
+                "email_blast_evaluations",
+                [campaign_id, email_blast.email_blast_draft.subject_line, email_blast.email_blast_draft.call_to_action],
+                self.scores(email_blast.evaluation, EMAIL_BLAST_SCORE_COLUMNS),
+            )
+
+        social_posts: list[SocialMediaPostWithEvaluation] = campaign_outputs.get("social_posts") or []
+        for i, post in enumerate(social_posts):
+            self.add_row(
+                "social_media_post_evaluations",
+                [campaign_id, i, post.social_media_post.platform, post.social_media_post.intended_audience],
+                self.scores(post.evaluation, SOCIAL_MEDIA_POST_SCORE_COLUMNS),
+            )
+
+        if self.total_pending_rows() >= self.batch_size:
+            self.flush()
+        return campaign_id
+
+    def has_campaign(self, campaign_id: str) -> bool:
+        if any(row[0] == campaign_id for row in self.pending_rows["campaigns"]):
+            return True
+        return self.connection.execute(
+            "SELECT 1 FROM campaigns WHERE campaign_id = ?", (campaign_id,)
+        ).fetchone() is not None
+
+    def scores(self, evaluation: BaseModel, columns: list[str]) -> list[int]:
+        return [getattr(evaluation, column) for column in columns]
+
+    def add_row(self, table: str, metadata: list, scores: list[int]):
+        self.pending_rows[table].append(tuple(metadata) + tuple(scores))
+
+    def total_pending_rows(self) -> int:
+        return sum(len(rows) for rows in self.pending_rows.values())
+
+    def flush(self):
+        """Writes all buffered rows, one `executemany` per table, in a single transaction.
+
+        The buffers are only cleared once the transaction commits, so a failed
+        flush rolls back without losing any rows.
+        """
+        with self.connection:
+            for table, rows in self.pending_rows.items():
+                if not rows:
+                    continue
+                columns = TABLE_METADATA_COLUMNS[table] + TABLE_SCORE_COLUMNS[table]
+                placeholders = ", ".join("?" for _ in columns)
+                self.connection.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    rows,
+                )
+        for rows in self.pending_rows.values():
+            rows.clear()
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        self.flush()
+        return self.connection.execute(sql, params).fetchall()
+
+    def mean_score_by_platform(self) -> list[tuple[str, float, int]]:
+        """Returns (platform, mean total score, number of posts), best platform first."""
+        return self.query(
+            """
+            SELECT LOWER(TRIM(platform)) AS platform, AVG(total_score) AS mean_score, COUNT(*) AS num_posts
+            FROM social_media_post_evaluations
+            GROUP BY LOWER(TRIM(platform))
+            ORDER BY mean_score DESC
+            """
+        )
+
+    def mean_scores(self, table: str) -> dict[str, float]:
+        """Returns the mean of every score column (and the total) for one evaluation table."""
+        columns = TABLE_SCORE_COLUMNS[table] + ["total_score"]
+        row = self.query(f"SELECT {', '.join(f'AVG({column})' for column in columns)} FROM {table}")[0]
+        return dict(zip(columns, row))
+
+    def top_campaigns(self, n: int = 10) -> list[tuple[str, str, float]]:
+        """Returns (campaign_id, idea, aggregate score) for the top `n` campaigns.
+
+        The aggregate score is the blog post total plus the email blast total
+        plus the mean social media post total; missing artifacts count as 0.
+        """
+        return self.query(
+            """
+            SELECT
+                c.campaign_id,
+                c.idea,
+                COALESCE(b.total_score, 0) + COALESCE(e.total_score, 0) + COALESCE(s.mean_score, 0) AS aggregate_score
+            FROM campaigns c
+            LEFT JOIN blog_post_evaluations b ON b.campaign_id = c.campaign_id
+            LEFT JOIN email_blast_evaluations e ON e.campaign_id = c.campaign_id
+            LEFT JOIN (
+                SELECT campaign_id, AVG(total_score) AS mean_score
+                FROM social_media_post_evaluations
+                GROUP BY campaign_id
+            ) s ON s.campaign_id = c.campaign_id
+            ORDER BY aggregate_score DESC
+            LIMIT ?
+            """,
+            (n,),
+        )
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,374 @@
+"""Long-running pipeline service.
+
+Keeps the agents (and their LLM clients) warm across jobs and exposes each
+pipeline stage over HTTP. Identical requests that are in flight at the same
+time are coalesced, so one upstream LLM call is shared by every waiter, and
+each stage has a bounded queue that rejects work with a 503 once full.
+
+Run with:
+    python -m marketing_agent_examples.service --port 8080
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from aiohttp import web
+from pydantic import BaseModel, ValidationError
+
+from marketing_agent_examples.agents import (
+    BlogPostAgent,
+    EmailBlastDraftAgent,
+    SocialMediaCampaignIdeaGenerationAgent,
+    SocialMediaPostAgent,
+)
+from marketing_agent_examples.models import (
+    BlogPost,
+    BlogPostWithEvaluation,
+    EmailBlastDraft,
+    EmailBlastDraftWithEvaluation,
+    ProposedIdea,
+    SocialMediaPost,
+    SocialMediaPostWithEvaluation,
+)
+from marketing_agent_examples.utils import fingerprint
+
+
+class ServiceOverloadedError(Exception):
+    """Raised when a stage's queue is full and the request cannot be accepted."""
+
+
+class BadRequestError(Exception):
+    """Raised when a request body is not a JSON object with the fields an endpoint needs."""
+
+
+class LatencyStats:
+    """Rolling latency statistics over the most recent `window` samples."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_seconds": self.percentile(0.50),
+            "p95_seconds": self.percentile(0.95),
+            "max_seconds": max(self.samples) if self.samples else None,
+        }
+
+
+class Stage:
+    """One pipeline stage: a single-flight table in front of a bounded work queue.
+
+    The first caller for a given key enqueues the work; every other caller
+    that arrives while it is in flight awaits the same future instead of
+    making its own upstream call. Blocking agent calls run on the stage's own
+    thread pool, so `num_workers` bounds its concurrency and a busy stage
+    cannot starve the others.
+    """
+
+    def __init__(self, name: str, max_queue_size: int = 64, num_workers: int = 4):
+        self.name = name
+        self.num_workers = num_workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.in_flight: dict[str, asyncio.Future] = {}
+        self.workers: list[asyncio.Task] = []
+        self.executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix=f"stage-{name}")
+
+        self.requests = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latency = LatencyStats()
+
+    def start(self):
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        while not self.queue.empty():
+            _, _, future = self.queue.get_nowait()
+            future.cancel()
+        self.in_flight.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, key: str, fn: Callable[[], Any]) -> Any:
+        self.requests += 1
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Shield so that one waiter being cancelled does not cancel the shared call.
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((key, fn, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ServiceOverloadedError(f"Stage '{self.name}' is at capacity ({self.queue.maxsize} queued)")
+        self.in_flight[key] = future
+        return await asyncio.shield(future)
+
+    async def worker(self):
+        while True:
+            key, fn, future = await self.queue.get()
+            start = time.perf_counter()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(self.executor, fn)
+                future.set_result(result)
+            except asyncio.CancelledError:
+                # Resolve the shared future so that waiters are not left hanging on shutdown.
+                future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                future.set_exception(e)
+            finally:
+                self.latency.record(time.perf_counter() - start)
+                self.in_flight.pop(key, None)
+                self.queue.task_done()
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_size": self.queue.maxsize,
+            "in_flight": len(self.in_flight),
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / self.requests if self.requests else 0.0,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency": self.latency.summary(),
+        }
+
+
+class CampaignPipelineService:
+    """Persistent, warm version of `SocialMediaManager`, with one `Stage` per LLM call type."""
+
+    STAGE_NAMES = [
+        "ideas",
+        "blog_post",
+        "blog_post_evaluation",
+        "email_blast",
+        "email_blast_evaluation",
+        "social_posts",
+        "social_post_evaluation",
+    ]
+
+    def __init__(self, max_queue_size: int = 64, num_workers: int = 4):
+        self.idea_generator = SocialMediaCampaignIdeaGenerationAgent()
+        self.blog_post_agent = BlogPostAgent()
+        self.email_blast_draft_agent = EmailBlastDraftAgent()
+        self.social_media_post_agent = SocialMediaPostAgent()
+
+        self.max_queue_size = max_queue_size
+        self.num_workers = num_workers
+        self.stages: dict[str, Stage] = {}
+
+    async def start(self):
+        # Queues and futures must be created inside the running event loop.
+        self.stages = {
+            name: Stage(name, max_queue_size=self.max_queue_size, num_workers=self.num_workers)
+            for name in self.STAGE_NAMES
+        }
+        for stage in self.stages.values():
+            stage.start()
+
+    async def stop(self):
+        await asyncio.gather(*(stage.stop() for stage in self.stages.values()))
+
+    async def generate_ideas(self):
+        return await self.stages["ideas"].submit(
+            fingerprint("ideas"),
+            self.idea_generator.generate_ideas,
+        )
+
+    async def create_blog_post(self, idea: ProposedIdea) -> BlogPost:
+        return await self.stages["blog_post"].submit(
+            fingerprint(idea),
+            lambda: self.blog_post_agent.create_blog_post(idea),
+        )
+
+    async def evaluate_blog_post(self, blog_post: BlogPost):
+        return await self.stages["blog_post_evaluation"].submit(
+            fingerprint(blog_post),
+            lambda: self.blog_post_agent.evaluate_blog_post(blog_post),
+        )
+
+    async def create_email_blast_draft(self, idea: ProposedIdea, blog_post: BlogPost) -> EmailBlastDraft:
+        return await self.stages["email_blast"].submit(
+            fingerprint(idea, blog_post),
+            lambda: self.email_blast_draft_agent.create_email_blast_draft(idea, blog_post),
+        )
+
+    async def evaluate_email_blast_draft(self, email_blast_draft: EmailBlastDraft):
+        return await self.stages["email_blast_evaluation"].submit(
+            fingerprint(email_blast_draft),
+            lambda: self.email_blast_draft_agent.evaluate_email_blast_draft(email_blast_draft),
+        )
+
+    async def create_social_media_posts(self, idea: ProposedIdea, blog_post: BlogPost, email_blast_draft: EmailBlastDraft):
+        return await self.stages["social_posts"].submit(
+            fingerprint(idea, blog_post, email_blast_draft, self.social_media_post_agent.num_posts),
+            lambda: self.social_media_post_agent.create_social_media_posts(idea, blog_post, email_blast_draft),
+        )
+
+    async def evaluate_social_media_post(self, post: SocialMediaPost):
+        return await self.stages["social_post_evaluation"].submit(
+            fingerprint(post),
+            lambda: self.social_media_post_agent.evaluate_social_media_post(post),
+        )
+
+    async def run_campaign(self, idea: ProposedIdea) -> dict:
+        """Runs the campaign pipeline for one idea, evaluating in parallel with downstream generation."""
+        blog_post = await self.create_blog_post(idea)
+        blog_post_evaluation, email_blast = await asyncio.gather(
+            self.evaluate_blog_post(blog_post),
+            self.create_email_blast_draft(idea, blog_post),
+        )
+        email_blast_evaluation, social_posts = await asyncio.gather(
+            self.evaluate_email_blast_draft(email_blast),
+            self.create_social_media_posts(idea, blog_post, email_blast),
+        )
+        social_post_evaluations = await asyncio.gather(
+            *(self.evaluate_social_media_post(post) for post in social_posts.posts)
+        )
+        return {
+            "idea": idea,
+            "blog_post": BlogPostWithEvaluation(blog_post=blog_post, evaluation=blog_post_evaluation),
+            "email_blast": EmailBlastDraftWithEvaluation(
+                email_blast_draft=email_blast, evaluation=email_blast_evaluation
+            ),
+            "social_posts": [
+                SocialMediaPostWithEvaluation(social_media_post=post, evaluation=evaluation)
+                for post, evaluation in zip(social_posts.posts, social_post_evaluations)
+            ],
+        }
+
+    def metrics(self) -> dict:
+        return {name: stage.metrics() for name, stage in self.stages.items()}
+
+
+def to_json(result) -> Any:
+    if isinstance(result, BaseModel):
+        return result.model_dump(mode="json")
+    if isinstance(result, dict):
+        return {key: to_json(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return [to_json(value) for value in result]
+    return result
+
+
+def create_app(service: Optional[CampaignPipelineService] = None) -> web.Application:
+    service = service or CampaignPipelineService()
+    endpoint_latency: dict[str, LatencyStats] = {}
+
+    @web.middleware
+    async def errors_and_latency(request: web.Request, handler):
+        # Unmatched routes share one key so that arbitrary 404 paths cannot grow the metrics without bound.
+        endpoint = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+        start = time.perf_counter()
+        try:
+            return await handler(request)
+        except BadRequestError as e:
+            return web.json_response({"error": e.args[0]}, status=400)
+        except ServiceOverloadedError as e:
+            return web.json_response({"error": str(e)}, status=503, headers={"Retry-After": "1"})
+        finally:
+            endpoint_latency.setdefault(f"{request.method} {endpoint}", LatencyStats()).record(time.perf_counter() - start)
+
+    def endpoint(handler: Callable[..., Any], **fields: type[BaseModel]):
+        """Wraps a service method, validating each body field against its model and passing them in order.
+
+        Only the request body is validated here, so errors raised by the agents
+        themselves still surface as 500s rather than being reported as client errors.
+        """
+        async def wrapped(request: web.Request) -> web.Response:
+            body = {}
+            if request.can_read_body:
+                try:
+                    body = await request.json()
+                except ValueError:
+                    raise BadRequestError("Request body must be valid JSON")
+            if not isinstance(body, dict):
+                raise BadRequestError("Request body must be a JSON object")
+            missing = [name for name in fields if name not in body]
+            if missing:
+                raise BadRequestError(f"Missing fields: {', '.join(missing)}")
+            args = []
+            for name, model in fields.items():
+                try:
+                    args.append(model.model_validate(body[name]))
+                except ValidationError as e:
+                    raise BadRequestError({name: e.errors(include_url=False, include_context=False)})
+            return web.json_response(to_json(await handler(*args)))
+        return wrapped
+
+    async def metrics(request: web.Request) -> web.Response:
+        return web.json_response({
+            "stages": service.metrics(),
+            "endpoints": {name: stats.summary() for name, stats in endpoint_latency.items()},
+        })
+
+    app = web.Application(middlewares=[errors_and_latency])
+    app.add_routes([
+        web.post("/ideas", endpoint(service.generate_ideas)),
+        web.post("/blog_posts", endpoint(service.create_blog_post, idea=ProposedIdea)),
+        web.post("/email_blasts", endpoint(
+            service.create_email_blast_draft, idea=ProposedIdea, blog_post=BlogPost
+        )),
+        web.post("/social_posts", endpoint(
+            service.create_social_media_posts,
+            idea=ProposedIdea, blog_post=BlogPost, email_blast_draft=EmailBlastDraft,
+        )),
+        web.post("/evaluations/blog_post", endpoint(service.evaluate_blog_post, blog_post=BlogPost)),
+        web.post("/evaluations/email_blast", endpoint(
+            service.evaluate_email_blast_draft, email_blast_draft=EmailBlastDraft
+        )),
+        web.post("/evaluations/social_post", endpoint(
+            service.evaluate_social_media_post, social_media_post=SocialMediaPost
+        )),
+        web.post("/campaigns", endpoint(service.run_campaign, idea=ProposedIdea)),
+        web.get("/metrics", metrics),
+    ])
+
+    async def start_service(app: web.Application):
+        await service.start()
+
+    async def stop_service(app: web.Application):
+        await service.stop()
+
+    app.on_startup.append(start_service)
+    app.on_cleanup.append(stop_service)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the marketing campaign pipeline as a long-running service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-queue-size", type=int, default=64, help="Maximum queued requests per stage before returning 503")
+    parser.add_argument("--num-workers", type=int, default=4, help="Concurrent upstream calls per stage")
+    args = parser.parse_args()
+
+    service = CampaignPipelineService(max_queue_size=args.max_queue_size, num_workers=args.num_workers)
+    web.run_app(create_app(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
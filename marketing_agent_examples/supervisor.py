@@ -0,0 +1,284 @@
+from typing import Callable, Optional
+
+from langchain_core.prompts import PromptTemplate
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_openai import ChatOpenAI
+from langchain.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
+
+from marketing_agent_examples.agents import (
+    BlogPostAgent,
+    EmailBlastDraftAgent,
+    SocialMediaPostAgent,
+)
+from marketing_agent_examples.models import (
+    BlogPost,
+    BlogPostWithEvaluation,
+    ConsistencyReview,
+    EmailBlastDraft,
+    EmailBlastDraftWithEvaluation,
+    ProposedIdea,
+    SocialMediaPostWithEvaluation,
+    SocialMediaPostsWrapper,
+)
+from marketing_agent_examples.utils import average_score, fingerprint
+
+# Artifacts in generation order. Each artifact is generated from the idea plus
+# the artifacts it depends on, so regenerating one invalidates its dependents.
+ARTIFACT_DEPENDENCIES = {
+    "blog_post": [],
+    "email_blast": ["blog_post"],
+    "social_posts": ["blog_post", "email_blast"],
+}
+
+REVIEW_PAIRS = [
+    ("blog_post", "email_blast"),
+    ("blog_post", "social_posts"),
+    ("email_blast", "social_posts"),
+]
+
+
+class SupervisorAgent:
+    """AI agent that checks two pieces of campaign content for consistency.
+
+    Given the campaign idea and two artifacts, it decides whether they tell the
+    same story (offer, audience, tone, call to action) and, if not, which one
+    should be rewritten and how.
+    """
+
+    def __init__(self):
+        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.0)
+
+        self.consistency_review_parser = PydanticOutputParser(pydantic_object=ConsistencyReview)
+
+    def review_consistency(
+        self,
+        idea: ProposedIdea,
+        first_name: str,
+        first_artifact: BaseModel,
+        second_name: str,
+        second_artifact: BaseModel,
+    ) -> ConsistencyReview:
+        consistency_review_prompt = PromptTemplate(
+            template="""
+                You are a marketing campaign supervisor for an American-style brunch restaurant. Your job is to make sure that every piece of content in a campaign is consistent.
+
+                The campaign idea is:
+                <idea>
+                Name: {idea_name}
+                Audience: {audience}
+                Campaign Message: {campaign_message}
+                Concept: {concept}
+                </idea>
+
+                Compare the following two pieces of content:
+
+                <{first_name}>
+                {first_artifact}
+                </{first_name}>
+
+                <{second_name}>
+                {second_artifact}
+                </{second_name}>
+
+                Check that they are consistent with each other and with the campaign idea:
+                - Do they promote the same offer, with the same prices and details?
+                - Do they target the same audience, with a compatible tone?
+                - Do their calls to action point the reader to the same next step?
+
+                If they are inconsistent, set `artifact_to_revise` to exactly one of "{first_name}" or "{second_name}" (whichever one is further from the campaign idea) and give specific feedback for rewriting it.
+
+                {format_instructions}
+            """,
+            input_variables=[
+                "idea_name", "audience", "campaign_message", "concept",
+                "first_name", "first_artifact", "second_name", "second_artifact",
+            ],
+            partial_variables={"format_instructions": self.consistency_review_parser.get_format_instructions()}
+        )
+        prompt_text = consistency_review_prompt.format(
+            idea_name=idea.idea,
+            audience=idea.audience,
+            campaign_message=idea.campaign_message,
+            concept=idea.concept,
+            first_name=first_name,
+            first_artifact=first_artifact.model_dump_json(indent=2),
+            second_name=second_name,
+            second_artifact=second_artifact.model_dump_json(indent=2),
+        )
+        messages = [
+            SystemMessage(content="You are a meticulous marketing campaign supervisor."),
+            HumanMessage(content=prompt_text)
+        ]
+        response = self.llm.invoke(messages)
+        return self.consistency_review_parser.parse(response.content)
+
+
+class IncrementalCampaignSupervisor:
+    """Supervisor loop that revises a campaign without rerunning the whole pipeline.
+
+    Every artifact is fingerprinted by its inputs (the idea, the artifacts it
+    depends on, and any reviewer feedback), and every generation, evaluation
+    and consistency review is stored in a memo table under that fingerprint.
+    On each revision round:
+    1. Artifacts whose inputs did not change are reused from the memo table,
+       along with their evaluations; only the rejected artifacts and their
+       dependents are regenerated and re-evaluated.
+    2. Only the artifact pairs whose fingerprints changed are sent to the
+       supervisor; unchanged pairs reuse their previous review.
+    3. Inconsistent pairs, and optionally artifacts scoring below
+       `min_average_score`, are rejected with feedback for the next round.
+
+    The memo table lives on the instance, so it is also shared across `run` calls.
+    """
+
+    def __init__(
+        self,
+        blog_post_agent: Optional[BlogPostAgent] = None,
+        email_blast_draft_agent: Optional[EmailBlastDraftAgent] = None,
+        social_media_post_agent: Optional[SocialMediaPostAgent] = None,
+        supervisor_agent: Optional[SupervisorAgent] = None,
+        max_revision_rounds: int = 3,
+        min_average_score: Optional[float] = None,
+    ):
+        self.blog_post_agent = blog_post_agent or BlogPostAgent()
+        self.email_blast_draft_agent = email_blast_draft_agent or EmailBlastDraftAgent()
+        self.social_media_post_agent = social_media_post_agent or SocialMediaPostAgent()
+        self.supervisor_agent = supervisor_agent or SupervisorAgent()
+        self.max_revision_rounds = max_revision_rounds
+        self.min_average_score = min_average_score
+
+        self.memo: dict[tuple[str, str], BaseModel] = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def memoised(self, stage: str, key: str, compute: Callable[[], BaseModel]) -> BaseModel:
+        if (stage, key) in self.memo:
+            self.memo_hits += 1
+            return self.memo[(stage, key)]
+        self.memo_misses += 1
+        result = compute()
+        self.memo[(stage, key)] = result
+        return result
+
+    def build_artifacts(self, idea: ProposedIdea, feedback: dict[str, Optional[str]]) -> dict[str, BaseModel]:
+        """Generates each artifact, reusing the memoised one when its inputs are unchanged."""
+        blog_post: BlogPost = self.memoised(
+            "blog_post",
+            fingerprint(idea, feedback["blog_post"]),
+            lambda: self.blog_post_agent.create_blog_post(idea, feedback=feedback["blog_post"]),
+        )
+        email_blast: EmailBlastDraft = self.memoised(
+            "email_blast",
+            fingerprint(idea, blog_post, feedback["email_blast"]),
+            lambda: self.email_blast_draft_agent.create_email_blast_draft(
+                idea, blog_post, feedback=feedback["email_blast"]
+            ),
+        )
+        social_posts: SocialMediaPostsWrapper = self.memoised(
+            "social_posts",
+            fingerprint(idea, blog_post, email_blast, self.social_media_post_agent.num_posts, feedback["social_posts"]),
+            lambda: self.social_media_post_agent.create_social_media_posts(
+                idea, blog_post, email_blast, feedback=feedback["social_posts"]
+            ),
+        )
+        return {"blog_post": blog_post, "email_blast": email_blast, "social_posts": social_posts}
+
+    def evaluate_artifacts(self, artifacts: dict[str, BaseModel]) -> dict:
+        """Evaluates each artifact, keyed by the artifact's own fingerprint so unchanged content is never re-scored."""
+        blog_post_evaluation = self.memoised(
+            "blog_post_evaluation",
+            fingerprint(artifacts["blog_post"]),
+            lambda: self.blog_post_agent.evaluate_blog_post(artifacts["blog_post"]),
+        )
+        email_blast_evaluation = self.memoised(
+            "email_blast_evaluation",
+            fingerprint(artifacts["email_blast"]),
+            lambda: self.email_blast_draft_agent.evaluate_email_blast_draft(artifacts["email_blast"]),
+        )
+        social_posts_with_eval = [
+            SocialMediaPostWithEvaluation(
+                social_media_post=post,
+                evaluation=self.memoised(
+                    "social_post_evaluation",
+                    fingerprint(post),
+                    lambda post=post: self.social_media_post_agent.evaluate_social_media_post(post),
+                ),
+            )
+            for post in artifacts["social_posts"].posts
+        ]
+        return {
+            "blog_post": BlogPostWithEvaluation(blog_post=artifacts["blog_post"], evaluation=blog_post_evaluation),
+            "email_blast": EmailBlastDraftWithEvaluation(
+                email_blast_draft=artifacts["email_blast"], evaluation=email_blast_evaluation
+            ),
+            "social_posts": social_posts_with_eval,
+        }
+
+    def review_pairs(self, idea: ProposedIdea, artifacts: dict[str, BaseModel]) -> dict[tuple[str, str], ConsistencyReview]:
+        """Reviews each artifact pair; pairs whose fingerprints are unchanged hit the memo table."""
+        reviews = {}
+        for first_name, second_name in REVIEW_PAIRS:
+            reviews[(first_name, second_name)] = self.memoised(
+                f"review:{first_name}:{second_name}",
+                fingerprint(idea, artifacts[first_name], artifacts[second_name]),
+                lambda first_name=first_name, second_name=second_name: self.supervisor_agent.review_consistency(
+                    idea, first_name, artifacts[first_name], second_name, artifacts[second_name]
+                ),
+            )
+        return reviews
+
+    def find_rejections(self, reviews: dict[tuple[str, str], ConsistencyReview], evaluated: dict) -> dict[str, str]:
+        """Returns the feedback for each rejected artifact."""
+        rejections: dict[str, list[str]] = {}
+        for (first_name, second_name), review in reviews.items():
+            if review.is_consistent:
+                continue
+            # The reviewer may leave this empty or name an artifact outside the pair; fall back to
+            # the downstream artifact, since it is cheaper to regenerate and has fewer dependents.
+            name = review.artifact_to_revise if review.artifact_to_revise in (first_name, second_name) else second_name
+            rejections.setdefault(name, []).append(review.feedback)
+
+        if self.min_average_score is not None:
+            low_scoring = {
+                "blog_post": [evaluated["blog_post"].evaluation],
+                "email_blast": [evaluated["email_blast"].evaluation],
+                "social_posts": [post.evaluation for post in evaluated["social_posts"]],
+            }
+            for name, evaluations in low_scoring.items():
+                for evaluation in evaluations:
+                    if average_score(evaluation) < self.min_average_score:
+                        rejections.setdefault(name, []).append(evaluation.comments)
+
+        return {name: "\n".join(feedback) for name, feedback in rejections.items()}
+
+    def run(self, idea: ProposedIdea) -> dict:
+        feedback: dict[str, Optional[str]] = {name: None for name in ARTIFACT_DEPENDENCIES}
+        previous_fingerprints = None
+
+        for revision_round in range(self.max_revision_rounds + 1):
+            artifacts = self.build_artifacts(idea, feedback)
+            evaluated = self.evaluate_artifacts(artifacts)
+            reviews = self.review_pairs(idea, artifacts)
+            rejections = self.find_rejections(reviews, evaluated)
+
+            print(
+                f"Revision round {revision_round}: rejected {sorted(rejections) or 'nothing'} "
+                f"(memo hits: {self.memo_hits}, misses: {self.memo_misses})"
+            )
+            current_fingerprints = {name: fingerprint(artifact) for name, artifact in artifacts.items()}
+            # Stop once everything passes, or when a revision produced identical content.
+            if not rejections or current_fingerprints == previous_fingerprints:
+                break
+            previous_fingerprints = current_fingerprints
+            for name, artifact_feedback in rejections.items():
+                feedback[name] = artifact_feedback
+
+        return {
+            **evaluated,
+            "reviews": reviews,
+            "revision_rounds": revision_round,
+            # False when the rounds ran out (or a revision stopped changing) with rejections still open.
+            "accepted": not rejections,
+            "unresolved_rejections": rejections,
+        }
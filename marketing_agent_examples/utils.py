@@ -1,16 +1,30 @@
+import hashlib
+import json
 import re
+from typing import Optional, TypeVar
 
-from lib.utils import get_client
+from pydantic import BaseModel, ValidationError
 
 
 DEFAULT_MODEL = "gpt-4o-mini"
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+CLOSING_BRACKETS = {"{": "}", "[": "]"}
+
+# JSON forbids raw control characters (below 0x20) inside strings.
+CONTROL_CHARACTER_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
 def llm_call(
     prompt: str,
     system_prompt: str,
     model: str = DEFAULT_MODEL,
     provider: str = "openai"
 ):
+    # Imported here because lib.utils builds the API clients at import time, which
+    # would make the parsing helpers below unusable without API keys.
+    from lib.utils import get_client
+
     client = get_client(provider)
     response = client.chat.completions.create(
         model=model,
@@ -37,3 +51,100 @@ def extract_xml(text: str, tag: str) -> str:
     """
     match = re.search(f'<{tag}>(.*?)</{tag}>', text, re.DOTALL)
     return match.group(1) if match else ""
+
+
+def repair_json(text: str) -> str:
+    """
+    Applies cheap local fixes to malformed JSON returned by an LLM, so it can be validated without a re-call.
+
+    Handles the common failure modes: surrounding markdown code fences or prose,
+    raw control characters (newlines, carriage returns, tabs, ...) inside strings, trailing commas, and output truncated
+    before the closing quotes/brackets.
+
+    Args:
+        text (str): The raw LLM output.
+
+    Returns:
+        str: The repaired JSON text (which may still be invalid if the damage was not one of the above).
+    """
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text.strip())
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    text = text[min(starts):]
+
+    output = []
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char in CONTROL_CHARACTER_ESCAPES:
+                char = CONTROL_CHARACTER_ESCAPES[char]
+            elif ord(char) < 0x20:
+                char = f"\\u{ord(char):04x}"
+            output.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in CLOSING_BRACKETS:
+            stack.append(CLOSING_BRACKETS[char])
+        elif char in "}]":
+            strip_trailing_comma(output)
+            if stack:
+                stack.pop()
+        output.append(char)
+        if not stack:
+            # Anything after the top-level value closes is trailing prose.
+            break
+
+    if in_string:
+        output.append('"')
+    strip_trailing_comma(output)
+    output.extend(reversed(stack))
+    return "".join(output)
+
+def strip_trailing_comma(output: list[str]):
+    while output and output[-1].isspace():
+        output.pop()
+    if output and output[-1] == ",":
+        output.pop()
+
+def parse_model_json(text: str, output_model: type[ModelT]) -> Optional[ModelT]:
+    """
+    Validates LLM output against a pydantic model with `model_validate_json`, repairing the JSON locally if needed.
+
+    Args:
+        text (str): The raw LLM output.
+        output_model (type[BaseModel]): The pydantic model to validate against.
+
+    Returns:
+        Optional[BaseModel]: The validated model, or None if the output is invalid even after repair.
+    """
+    try:
+        return output_model.model_validate_json(text)
+    except ValidationError:
+        pass
+    try:
+        return output_model.model_validate_json(repair_json(text))
+    except ValidationError:
+        return None
+
+def fingerprint(*parts) -> str:
+    """Returns a stable hash of pydantic models and/or plain JSON-serialisable values."""
+    serialised = [
+        part.model_dump(mode="json") if isinstance(part, BaseModel) else part
+        for part in parts
+    ]
+    return hashlib.sha256(json.dumps(serialised, sort_keys=True).encode("utf-8")).hexdigest()
+
+def average_score(evaluation: BaseModel) -> float:
+    scores = [value for value in evaluation.model_dump().values() if isinstance(value, int) and not isinstance(value, bool)]
+    return sum(scores) / len(scores)